@@ -1,32 +1,173 @@
+import numpy as np
 import pandas as pd
 import psycopg2
-from sqlalchemy import create_engine, text
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import io
+from sqlalchemy import URL, create_engine, text
 import os
 from dotenv import load_dotenv
 import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 import pytz
 
-# Load environment variables
-load_dotenv()
-
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Number of CSV rows read, transformed and loaded at a time
+CSV_CHUNK_SIZE = 50000
+
+# Map CSV column names to standardized names
+COLUMN_MAPPING = {
+    'Tasker ID': 'tasker_id',
+    'Name': 'name',
+    'Email': 'email',
+    'Phone Number': 'phone_number',
+    'Tenure Months': 'tenure_months',
+    'Lifetime Submitted Invoices Bucket': 'lifetime_submitted_invoices_bucket',
+    'Metro Name': 'metro_name',
+    'Job Id': 'job_id',
+    'Postal Code': 'postal_code',
+    'Latitude': 'latitude',
+    'Longitude': 'longitude',
+    'Country Key': 'country_key',
+    'Latest Schedule Start At': 'latest_schedule_start_at',
+    'Time Zone': 'time_zone',
+    'Is Job Bundle': 'is_job_bundle',
+    'Is Assigned': 'is_assigned',
+    'Is Accepted': 'is_accepted',
+    'Is Scheduled': 'is_scheduled',
+    'Marketplace Key': 'marketplace_key',
+    'Description': 'description',
+    'Duration Hours': 'duration_hours',
+    'Tasker Take Home Pay': 'tasker_take_home_pay',
+    'Locale': 'locale',
+    'Trimmed Address': 'trimmed_address'
+}
+
+# Unit designator (and everything after it) to strip from the street part of an address;
+# a plain pattern with inline flags and no lookaheads, so Arrow strings stay on the RE2 fast path
+ADDRESS_UNIT_PATTERN = r'(?i)(?:^| )(?:apt\.?|apartment|unit|suite|building|floor|room)(?: .*|$)'
+
+# Standardized columns that must be present in the CSV
+REQUIRED_COLUMNS = [
+    'tasker_id', 'name', 'email', 'phone_number', 'tenure_months', 
+    'lifetime_submitted_invoices_bucket', 'metro_name', 'job_id', 
+    'postal_code', 'latitude', 'longitude', 'country_key', 
+    'latest_schedule_start_at', 'time_zone', 'is_job_bundle', 
+    'is_assigned', 'is_accepted', 'is_scheduled', 'marketplace_key', 
+    'description', 'duration_hours', 'tasker_take_home_pay', 'locale', 'trimmed_address'
+]
+
+# Explicit CSV dtypes so the C parser skips type inference; coordinates and amounts stay float64
+# (double precision) so no digits are lost, and free-text columns are parsed straight into
+# Arrow-backed strings, which COPY serializes without conversion
+CSV_DTYPES = {
+    'Tasker ID': 'Int64',
+    'Latitude': 'float64',
+    'Longitude': 'float64',
+    'Duration Hours': 'float64',
+    'Tasker Take Home Pay': 'float64',
+    'Tenure Months': 'Int16',
+    'Is Job Bundle': 'boolean',
+    'Is Assigned': 'boolean',
+    'Is Accepted': 'boolean',
+    'Is Scheduled': 'boolean',
+    'Metro Name': 'category',
+    'Country Key': 'category',
+    'Time Zone': 'category',
+    'Marketplace Key': 'category',
+    'Name': 'string[pyarrow]',
+    'Email': 'string[pyarrow]',
+    'Phone Number': 'string[pyarrow]',
+    'Lifetime Submitted Invoices Bucket': 'category',
+    'Description': 'string[pyarrow]',
+    'Locale': 'category',
+    'Trimmed Address': 'string[pyarrow]',
+    # Identifiers are typed explicitly so the schema doesn't depend on which chunk is read
+    # first (e.g. all-numeric postal codes followed by 'K1A 0B6')
+    'Postal Code': 'string[pyarrow]',
+    'Job Id': 'string[pyarrow]'
+}
+
+# The same dtypes keyed by standardized names, since columns are renamed as they are parsed
+STANDARDIZED_DTYPES = {COLUMN_MAPPING[col]: dtype for col, dtype in CSV_DTYPES.items()}
+
+# Spellings parsed into the nullable boolean is_* columns
+CSV_TRUE_VALUES = ['True', 'true', 't', '1']
+CSV_FALSE_VALUES = ['False', 'false', 'f', '0']
+
+@dataclass(frozen=True)
+class DBConfig:
+    """PostgreSQL connection settings."""
+    host: str
+    port: int
+    database: str
+    user: str
+    password: str
+
+
+@lru_cache(maxsize=1)
+def get_db_config(env_file=None):
+    """Load environment variables (from env_file, or the default .env) once and return the DB config."""
+    load_dotenv(env_file)
+    return DBConfig(
+        host=os.getenv('DB_HOST'),
+        port=int(os.getenv('DB_PORT') or 5432),
+        database=os.getenv('DB_NAME'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD')
+    )
+
+
+@lru_cache(maxsize=None)
+def get_timezone(timezone_str):
+    """Return the pytz timezone for a name, or None if the name is invalid. Each name is resolved once."""
+    # pytz rather than zoneinfo: on pandas 2.2, dt.tz_convert(...).dt.tz_localize(None) with a
+    # ZoneInfo is ~25x slower than with pytz (pandas 3 runs both at the same speed)
+    try:
+        return pytz.timezone(timezone_str)
+    except Exception:
+        logger.warning(f"Invalid timezone '{timezone_str}', keeping UTC")
+        return None
+
+
 class TaskerAssignmentDBPopulator:
-    def __init__(self, use_test_tables=False):
-        """Initialize the database populator with connection parameters."""
-        self.db_config = {
-            'host': os.getenv('DB_HOST'),
-            'port': os.getenv('DB_PORT', 5432),
-            'database': os.getenv('DB_NAME'),
-            'user': os.getenv('DB_USER'),
-            'password': os.getenv('DB_PASSWORD')
-        }
+    def __init__(self, use_test_tables=False, store_utc_timestamps=False, config=None):
+        """
+        Initialize the database populator with connection parameters.
+        With store_utc_timestamps, latest_schedule_start_at is stored as a UTC instant
+        (timestamptz) instead of being converted to local time.
+        config is a DBConfig; defaults to get_db_config() (the default .env file).
+        """
+        self.db_config = config if config is not None else get_db_config()
+        # URL.create escapes special characters in the user name and password
+        self.connection_url = URL.create(
+            'postgresql+psycopg2',
+            username=self.db_config.user,
+            password=self.db_config.password,
+            host=self.db_config.host,
+            port=self.db_config.port,
+            database=self.db_config.database
+        )
         self.engine = None
         self.use_test_tables = use_test_tables
+        self.store_utc_timestamps = store_utc_timestamps
+        
+        # Tasker IDs already loaded during this run, used to dedupe across chunks
+        self.seen_tasker_ids = set()
+        
+        # Whether COPY may use FREEZE (target tables were recreated in the load transaction)
+        self.copy_freeze = False
+        
+        # Tables whose schema was already created or replaced during this run
+        self.prepared_tables = set()
         
         # Define table names based on test/prod mode
         if use_test_tables:
@@ -37,128 +178,135 @@ class TaskerAssignmentDBPopulator:
             self.tasker_data_table = 'taskrabbit_tasker_data_1'
         
     def connect_to_database(self):
-        """Establish connection to PostgreSQL database."""
+        """Establish connection to PostgreSQL database. The engine is created once and reused."""
+        if self.engine is not None:
+            return True
+        
         try:
-            connection_string = f"postgresql://{self.db_config['user']}:{self.db_config['password']}@{self.db_config['host']}:{self.db_config['port']}/{self.db_config['database']}"
-            self.engine = create_engine(connection_string)
+            self.engine = create_engine(self.connection_url, pool_pre_ping=False)
             logger.info("Successfully connected to PostgreSQL database")
             return True
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             return False
     
-    def read_csv_file(self, csv_path):
-        """Read CSV file and return DataFrame with standardized column names."""
+    def read_csv_columns(self, csv_path):
+        """Read only the CSV header row and return the column names."""
         try:
-            df = pd.read_csv(csv_path)
-            logger.info(f"Successfully read CSV file: {csv_path}")
-            logger.info(f"CSV contains {len(df)} rows and {len(df.columns)} columns")
-            
-            # Map CSV column names to standardized names
-            column_mapping = {
-                'Tasker ID': 'tasker_id',
-                'Name': 'name',
-                'Email': 'email',
-                'Phone Number': 'phone_number',
-                'Tenure Months': 'tenure_months',
-                'Lifetime Submitted Invoices Bucket': 'lifetime_submitted_invoices_bucket',
-                'Metro Name': 'metro_name',
-                'Job Id': 'job_id',
-                'Postal Code': 'postal_code',
-                'Latitude': 'latitude',
-                'Longitude': 'longitude',
-                'Country Key': 'country_key',
-                'Latest Schedule Start At': 'latest_schedule_start_at',
-                'Time Zone': 'time_zone',
-                'Is Job Bundle': 'is_job_bundle',
-                'Is Assigned': 'is_assigned',
-                'Is Accepted': 'is_accepted',
-                'Is Scheduled': 'is_scheduled',
-                'Marketplace Key': 'marketplace_key',
-                'Description': 'description',
-                'Duration Hours': 'duration_hours',
-                'Tasker Take Home Pay': 'tasker_take_home_pay',
-                'Locale': 'locale',
-                'Trimmed Address': 'trimmed_address'
-            }
-            
-            # Rename columns to standardized names
-            df = df.rename(columns=column_mapping)
-            logger.info("Successfully standardized column names")
-            
-            # Fill empty duration_hours with default value of 2 hours
-            if 'duration_hours' in df.columns:
-                empty_count = df['duration_hours'].isna().sum() + (df['duration_hours'] == '').sum()
-                df['duration_hours'] = df['duration_hours'].replace('', None)
-                df['duration_hours'] = df['duration_hours'].fillna(2.0)
-                if empty_count > 0:
-                    logger.info(f"Filled {empty_count} empty duration_hours values with default of 2.0 hours")
-            
-            return df
+            return pd.read_csv(csv_path, nrows=0).columns.tolist()
         except Exception as e:
             logger.error(f"Failed to read CSV file: {e}")
             return None
     
+    def read_csv_file(self, csv_path, csv_columns=None, chunk_size=CSV_CHUNK_SIZE):
+        """
+        Open CSV file and return an iterator over DataFrame chunks of chunk_size rows.
+        The header row (csv_columns, read from the file if not given) is replaced with
+        standardized names at parse time, and only the required columns are parsed.
+        """
+        if csv_columns is None:
+            csv_columns = self.read_csv_columns(csv_path)
+            if csv_columns is None:
+                return None
+        names = [COLUMN_MAPPING.get(col, col) for col in csv_columns]
+        
+        try:
+            reader = pd.read_csv(
+                csv_path,
+                chunksize=chunk_size,
+                header=0,
+                names=names,
+                dtype=STANDARDIZED_DTYPES,
+                true_values=CSV_TRUE_VALUES,
+                false_values=CSV_FALSE_VALUES,
+                usecols=[name for name in names if name in REQUIRED_COLUMNS],
+                engine='c'
+            )
+            logger.info(f"Successfully opened CSV file: {csv_path}")
+            logger.info(f"Reading CSV in chunks of {chunk_size} rows")
+            return reader
+        except Exception as e:
+            logger.error(f"Failed to read CSV file: {e}")
+            return None
+    
+    def prefetch_chunks(self, reader):
+        """
+        Yield chunks from a CSV reader while the next chunk is parsed in a background thread.
+        The C parser releases the GIL, so parsing overlaps with transforming and loading.
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(next, reader, None)
+            while True:
+                chunk = future.result()
+                if chunk is None:
+                    break
+                future = executor.submit(next, reader, None)
+                yield chunk
+    
+    def fill_default_values(self, df):
+        """
+        Fill default values for missing data in a chunk. Column names and dtypes are
+        already standardized by read_csv_file while parsing.
+        """
+        # Fill empty duration_hours with default value of 2 hours
+        if 'duration_hours' in df.columns:
+            # The column is parsed as a float, so empty values are already NaN
+            empty_count = df['duration_hours'].isna().sum()
+            df['duration_hours'] = df['duration_hours'].fillna(2.0)
+            if empty_count > 0:
+                logger.info(f"Filled {empty_count} empty duration_hours values with default of 2.0 hours")
+        
+        return df
+    
     def convert_timezone(self, df):
         """
         Convert latest_schedule_start_at from UTC to the timezone specified in time_zone column.
         Assumes timestamps in CSV are in UTC. Converts to target timezone and stores as timezone-naive.
+        With store_utc_timestamps, the column is kept as tz-aware UTC instead, so it is stored as
+        timestamptz and PostgreSQL renders it per session timezone; time_zone is still stored.
         """
+        # Parse once as UTC; naive values are assumed UTC, aware values are converted to UTC
+        # ISO8601 skips per-value format inference; cache dedupes repeated timestamps
+        utc_series = pd.to_datetime(
+            df['latest_schedule_start_at'],
+            format='ISO8601',
+            utc=True,
+            cache=True,
+            errors='coerce'
+        )
+        
+        # Values that were present in the CSV but couldn't be parsed are stored as NULL
+        unparsed_count = (utc_series.isna() & df['latest_schedule_start_at'].notna()).sum()
+        if unparsed_count > 0:
+            logger.warning(f"Stored {unparsed_count} unparseable latest_schedule_start_at values as NULL")
+        
         try:
-            # Convert latest_schedule_start_at to datetime if it's not already
-            df['latest_schedule_start_at'] = pd.to_datetime(df['latest_schedule_start_at'])
+            # Store UTC instants as-is and skip the per-timezone conversion
+            if self.store_utc_timestamps:
+                df['latest_schedule_start_at'] = utc_series
+                logger.info("Keeping timestamps in UTC (stored as timestamptz)")
+                return df
             
             # Check if time_zone column exists
             if 'time_zone' not in df.columns:
                 logger.warning("time_zone column not found, skipping timezone conversion")
-                # Remove timezone info if present to keep naive
-                if df['latest_schedule_start_at'].dt.tz is not None:
-                    df['latest_schedule_start_at'] = df['latest_schedule_start_at'].dt.tz_localize(None)
+                df['latest_schedule_start_at'] = utc_series.dt.tz_localize(None)
                 return df
             
-            # Get UTC timezone
-            utc_tz = pytz.utc
+            # Rows with a missing or invalid timezone keep their UTC wall time
+            converted = utc_series.dt.tz_localize(None).copy()
             
-            # Function to convert each row from UTC to target timezone
-            def convert_utc_to_timezone(row):
-                try:
-                    dt = row['latest_schedule_start_at']
-                    timezone_str = row['time_zone']
-                    
-                    # Skip if datetime or timezone is missing
-                    if pd.isna(dt) or pd.isna(timezone_str) or timezone_str == '':
-                        return dt
-                    
-                    # If datetime already has timezone, use it; otherwise assume UTC
-                    if dt.tzinfo is None:
-                        # Assume UTC and localize
-                        utc_dt = utc_tz.localize(dt)
-                    else:
-                        # Convert to UTC first if it's in a different timezone
-                        utc_dt = dt.astimezone(utc_tz)
-                    
-                    # Get target timezone
-                    try:
-                        target_tz = pytz.timezone(str(timezone_str))
-                    except Exception:
-                        logger.warning(f"Invalid timezone '{timezone_str}', keeping UTC")
-                        target_tz = utc_tz
-                    
-                    # Convert from UTC to target timezone
-                    converted_dt = utc_dt.astimezone(target_tz)
-                    
-                    # Remove timezone info to make it naive (for timezone-unaware database column)
-                    return converted_dt.replace(tzinfo=None)
-                    
-                except Exception as e:
-                    logger.warning(f"Timezone conversion failed for row: {e}")
-                    # Return original datetime without timezone
-                    if dt.tzinfo is not None:
-                        return dt.replace(tzinfo=None)
-                    return dt
+            # Convert each timezone group in a single vectorized pass, addressing rows by position
+            # so no index label lookups are needed
+            for timezone_str, positions in df.groupby('time_zone', sort=False, observed=True).indices.items():
+                if timezone_str == '':
+                    continue
+                target_tz = get_timezone(str(timezone_str))
+                if target_tz is None:
+                    continue
+                converted.iloc[positions] = utc_series.iloc[positions].dt.tz_convert(target_tz).dt.tz_localize(None)
             
-            # Apply conversion row by row
-            df['latest_schedule_start_at'] = df.apply(convert_utc_to_timezone, axis=1)
+            df['latest_schedule_start_at'] = converted
             
             # Log a sample to verify conversion
             sample_dt = df['latest_schedule_start_at'].iloc[0] if len(df) > 0 else None
@@ -171,27 +319,145 @@ class TaskerAssignmentDBPopulator:
             
         except Exception as e:
             logger.error(f"Error processing timestamps: {e}")
-            # Fallback: try to ensure datetime type is preserved
-            try:
-                df['latest_schedule_start_at'] = pd.to_datetime(df['latest_schedule_start_at'])
-                if df['latest_schedule_start_at'].dt.tz is not None:
-                    df['latest_schedule_start_at'] = df['latest_schedule_start_at'].dt.tz_localize(None)
-            except Exception:
-                pass
+            # Fallback: keep the parsed UTC values, timezone-naive unless storing UTC
+            if self.store_utc_timestamps:
+                df['latest_schedule_start_at'] = utc_series
+            else:
+                df['latest_schedule_start_at'] = utc_series.dt.tz_localize(None)
             return df
 
-    def remove_apt_from_address(self, address):
-        """Remove 'apt' from the address."""
-        final_address = ''
-        for word in address.split(' '):
-            if word.lower() not in ['apt', 'unit', 'suite', 'building', 'floor', 'room', "apartment", "apt."]:
-                final_address += word + ' '
-            else:
-                break
-        final_address = final_address.strip()
-        return final_address
+    def normalize_locale(self, df):
+        """
+        Normalize the locale column once per chunk, since both the tasks and tasker data
+        tables store it. Values are reduced to a 2-letter language code, defaulting to 'en'.
+        """
+        if 'locale' not in df.columns:
+            return df
+        
+        # First matching language wins, in this order; empty and unknown values default to 'en'
+        languages = ['en', 'es', 'fr', 'de', 'it']
+        # (cast to object first so fillna also works on categorical columns)
+        locale_str = df['locale'].astype('object').fillna('').astype(str).str.lower()
+        conditions = [locale_str.str.contains(language, regex=False).to_numpy() for language in languages]
+        df['locale'] = pd.Categorical(np.select(conditions, languages, default='en'), categories=languages)
+        return df
+    
+    def clean_trimmed_address(self, df):
+        """Keep only the street part of trimmed_address, without apt/unit/etc."""
+        if 'trimmed_address' not in df.columns:
+            return df
+        
+        # Fill NaN values with empty string, then keep the part before the first comma
+        address = df['trimmed_address'].fillna('')
+        # (a regex replace rather than split/str[0], which would leave Python objects)
+        address = address.str.replace(r'(?s),.*', '', regex=True).str.strip()
+        
+        # Cut the address at the first apt/unit/etc word
+        df['trimmed_address'] = address.str.replace(ADDRESS_UNIT_PATTERN, '', regex=True).str.strip()
+        return df
     
-    def populate_tasks_table(self, df, replace_existing=False):
+    def copy_dataframe(self, df, conn, table_name, replace_existing=False):
+        """
+        Bulk load a DataFrame into a table with PostgreSQL COPY FROM STDIN on conn.
+        The table schema is still created (or replaced) by to_sql from an empty frame,
+        once per table per run. Nothing is committed here; the caller owns the transaction.
+        """
+        # Object columns can mix Python types (e.g. ints and strs from differently inferred
+        # parser blocks), which Arrow can't convert, so send them as strings
+        object_columns = df.select_dtypes(include='object').columns
+        if len(object_columns) > 0:
+            df = df.astype({col: 'string[pyarrow]' for col in object_columns})
+        
+        # Create or replace the table schema without inserting any rows
+        if replace_existing or table_name not in self.prepared_tables:
+            if_exists_mode = 'replace' if replace_existing else 'append'
+            df.head(0).to_sql(
+                table_name,
+                conn,
+                if_exists=if_exists_mode,
+                index=False
+            )
+            self.prepared_tables.add(table_name)
+        
+        # Serialize the rows as CSV with Arrow's C++ writer; nulls become unquoted empty fields
+        buffer = io.BytesIO()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pacsv.write_csv(table, buffer, pacsv.WriteOptions(include_header=False))
+        buffer.seek(0)
+        
+        # FREEZE writes rows already frozen, skipping hint-bit rewrites and a later VACUUM freeze pass
+        columns = ', '.join(df.columns)
+        copy_options = 'FORMAT CSV, FREEZE' if self.copy_freeze else 'FORMAT CSV'
+        copy_sql = f"COPY {table_name} ({columns}) FROM STDIN WITH ({copy_options})"
+        
+        # Use the DBAPI connection behind conn so COPY joins the open transaction
+        with conn.connection.cursor() as cursor:
+            cursor.copy_expert(copy_sql, buffer)
+    
+    def configure_load_session(self, conn):
+        """
+        Tune settings for the load transaction on conn. SET LOCAL only lasts until the
+        transaction ends, so pooled connections go back with their defaults.
+        """
+        # Don't wait for the WAL fsync on commit; a crash right after commit can lose the load, not corrupt it
+        conn.exec_driver_sql("SET LOCAL synchronous_commit TO off")
+        # More memory for sorts/hashes and for rebuilding indexes after the load
+        conn.exec_driver_sql("SET LOCAL work_mem TO '256MB'")
+        conn.exec_driver_sql("SET LOCAL maintenance_work_mem TO '1GB'")
+    
+    def check_utc_timestamp_column(self, conn):
+        """
+        Check that UTC timestamps can be appended to the tasks table. A timestamp (without
+        time zone) column would store the UTC wall-clock times next to existing local times,
+        so latest_schedule_start_at must be timestamptz if the table already exists.
+        """
+        result = conn.execute(text("""
+            SELECT data_type
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = :table_name
+                AND column_name = 'latest_schedule_start_at'
+        """), {'table_name': self.tasks_table})
+        row = result.fetchone()
+        if row is not None and row[0] != 'timestamp with time zone':
+            logger.error(
+                f"Cannot append UTC timestamps to {self.tasks_table}: latest_schedule_start_at is "
+                f"'{row[0]}', not timestamptz. Use --replace or load local times instead."
+            )
+            return False
+        return True
+    
+    def drop_secondary_indexes(self, conn, table_name):
+        """
+        Drop indexes on table_name that don't back a constraint, so the bulk load
+        doesn't pay per-row index maintenance. Returns the DDL to recreate them.
+        """
+        result = conn.execute(text("""
+            SELECT index_class.relname, pg_get_indexdef(idx.indexrelid)
+            FROM pg_index idx
+            JOIN pg_class index_class ON index_class.oid = idx.indexrelid
+            LEFT JOIN pg_constraint con ON con.conindid = idx.indexrelid
+            WHERE idx.indrelid = to_regclass(:table_name) AND con.oid IS NULL
+        """), {'table_name': table_name})
+        indexes = result.fetchall()
+        
+        quote = conn.dialect.identifier_preparer.quote
+        for index_name, _ in indexes:
+            conn.exec_driver_sql(f"DROP INDEX {quote(index_name)}")
+        
+        if indexes:
+            logger.info(f"Dropped {len(indexes)} indexes on {table_name} for bulk load")
+        return [index_def for _, index_def in indexes]
+    
+    def recreate_indexes(self, conn, index_defs):
+        """Recreate indexes from the DDL returned by drop_secondary_indexes."""
+        for index_def in index_defs:
+            # Index definitions may contain % (e.g. LIKE patterns), so skip DBAPI param formatting
+            conn.exec_driver_sql(index_def, execution_options={'no_parameters': True})
+        
+        if index_defs:
+            logger.info(f"Recreated {len(index_defs)} indexes after bulk load")
+    
+    def populate_tasks_table(self, df, conn, replace_existing=False):
         """
         Populate the tasks table with job-related data from CSV.
         Maps CSV columns to taskrabbit_tasks table columns.
@@ -205,84 +471,37 @@ class TaskerAssignmentDBPopulator:
                 'marketplace_key', 'description', 'duration_hours', 'tasker_take_home_pay', 'locale', 'trimmed_address'
             ]
             
-            # Extract only the required columns
-            tasks_df = df[tasks_columns].copy()
+            # Extract only the required columns; the frame is not modified, so no copy is needed
+            tasks_df = df[tasks_columns]
             
             # Ensure latest_schedule_start_at is timezone-naive (as received from CSV)
             if 'latest_schedule_start_at' in tasks_df.columns:
-                # Ensure it's timezone-naive (should be from convert_timezone)
-                if tasks_df['latest_schedule_start_at'].dt.tz is not None:
+                # Ensure it's timezone-naive (should be from convert_timezone) unless storing UTC
+                if not self.store_utc_timestamps and tasks_df['latest_schedule_start_at'].dt.tz is not None:
                     # Remove timezone if present
-                    tasks_df['latest_schedule_start_at'] = tasks_df['latest_schedule_start_at'].dt.tz_localize(None)
+                    tasks_df = tasks_df.assign(
+                        latest_schedule_start_at=tasks_df['latest_schedule_start_at'].dt.tz_localize(None)
+                    )
                 
                 # Log what we're about to insert
                 sample_before = tasks_df['latest_schedule_start_at'].iloc[0] if len(tasks_df) > 0 else None
                 if sample_before is not None and pd.notna(sample_before):
-                    logger.info(f"Sample timestamp before SQL insert (timezone-naive): {sample_before}")
-
-            if 'locale' in tasks_df.columns:
-                # Normalize locale values - extract first 2 characters if longer, default to 'en'
-                def normalize_locale(locale_val):
-                    if pd.isna(locale_val) or locale_val == '':
-                        return 'en'
-                    locale_str = str(locale_val).lower()
-                    if 'en' in locale_str:
-                        return 'en'
-                    elif 'es' in locale_str:
-                        return 'es'
-                    elif 'fr' in locale_str:
-                        return 'fr'
-                    elif 'de' in locale_str:
-                        return 'de'
-                    elif 'it' in locale_str:
-                        return 'it'
-                    else:
-                        return 'en'
-                
-                tasks_df['locale'] = tasks_df['locale'].apply(normalize_locale)
-
-            if 'trimmed_address' in tasks_df.columns:
-                # Fill NaN values with empty string
-                tasks_df['trimmed_address'] = tasks_df['trimmed_address'].fillna('')
-                
-                # Split by comma and take first part, then remove apt/unit/etc
-                def process_address(address):
-                    if pd.isna(address) or address == '':
-                        return ''
-                    # Split by comma and take first part
-                    address_str = str(address).split(',')[0].strip()
-                    # Remove apt/unit/etc if present
-                    if any(word in address_str.lower() for word in ['apt', 'unit', 'suite', 'building', 'floor', 'room', 'apartment', 'apt.']):
-                        return self.remove_apt_from_address(address_str)
-                    return address_str
-                
-                tasks_df['trimmed_address'] = tasks_df['trimmed_address'].apply(process_address)
+                    logger.info(f"Sample timestamp before SQL insert: {sample_before}")
             
             # No need to remove duplicates - each job_id should be unique
             # The database will handle any primary key constraints
             
-            # Insert data into tasks table
-            if_exists_mode = 'replace' if replace_existing else 'append'
-            
-            # Insert using standard method - timestamps will be stored as-is (timezone-naive)
-            tasks_df.to_sql(
-                self.tasks_table, 
-                self.engine, 
-                if_exists=if_exists_mode, 
-                index=False,
-                method='multi'
-            )
+            # Insert data into tasks table using COPY - timestamps will be stored as-is (timezone-naive)
+            self.copy_dataframe(tasks_df, conn, self.tasks_table, replace_existing)
             
             logger.info(f"Successfully populated {self.tasks_table} with {len(tasks_df)} records")
             
-            # Verify what was actually stored by querying back
-            if 'latest_schedule_start_at' in tasks_df.columns and len(tasks_df) > 0:
+            # Verify what was actually stored by querying back (diagnostic only, so debug logging)
+            if logger.isEnabledFor(logging.DEBUG) and 'latest_schedule_start_at' in tasks_df.columns and len(tasks_df) > 0:
                 try:
-                    with self.engine.connect() as conn:
-                        result = conn.execute(text(f"SELECT latest_schedule_start_at FROM {self.tasks_table} LIMIT 1"))
-                        stored_value = result.fetchone()[0]
-                        logger.info(f"Verified stored timestamp: {stored_value}")
-                        conn.commit()
+                    result = conn.execute(text(f"SELECT latest_schedule_start_at FROM {self.tasks_table} LIMIT 1"))
+                    stored_value = result.fetchone()[0]
+                    logger.debug(f"Verified stored timestamp: {stored_value}")
                 except Exception as e:
                     logger.warning(f"Could not verify stored timestamp: {e}")
             
@@ -292,7 +511,7 @@ class TaskerAssignmentDBPopulator:
             logger.error(f"Error populating tasks table: {e}")
             return False
     
-    def populate_tasker_data_table(self, df, replace_existing=False):
+    def populate_tasker_data_table(self, df, conn, replace_existing=False):
         """
         Populate the tasker data table with tasker-related data from CSV.
         Maps CSV columns to taskrabbit_tasker_data table columns.
@@ -308,42 +527,20 @@ class TaskerAssignmentDBPopulator:
             if 'locale' in df.columns:
                 tasker_columns.append('locale')
             
-            # Extract only the required columns
-            tasker_df = df[tasker_columns].copy()
-            
-            # Remove duplicates based on tasker_id (each tasker should appear only once)
-            tasker_df = tasker_df.drop_duplicates(subset=['tasker_id'])
+            # Find the first row of each tasker_id (each tasker should appear only once),
+            # skipping taskers already loaded from earlier chunks
+            tasker_ids = df['tasker_id'].drop_duplicates()
+            # Probe the seen set per unique ID; isin(set) would rebuild a hash table of
+            # every tasker seen so far on each chunk
+            is_new = [tasker_id not in self.seen_tasker_ids for tasker_id in tasker_ids.tolist()]
+            tasker_ids = tasker_ids[is_new]
+            self.seen_tasker_ids.update(tasker_ids)
             
-            # Normalize locale values if locale column exists
-            if 'locale' in tasker_df.columns:
-                def normalize_locale(locale_val):
-                    if pd.isna(locale_val) or locale_val == '':
-                        return 'en'
-                    locale_str = str(locale_val).lower()
-                    if 'en' in locale_str:
-                        return 'en'
-                    elif 'es' in locale_str:
-                        return 'es'
-                    elif 'fr' in locale_str:
-                        return 'fr'
-                    elif 'de' in locale_str:
-                        return 'de'
-                    elif 'it' in locale_str:
-                        return 'it'
-                    else:
-                        return 'en'
-                
-                tasker_df['locale'] = tasker_df['locale'].apply(normalize_locale)
+            # Extract only the required columns for those rows
+            tasker_df = df.loc[tasker_ids.index, tasker_columns]
             
-            # Insert data into tasker data table
-            if_exists_mode = 'replace' if replace_existing else 'append'
-            tasker_df.to_sql(
-                self.tasker_data_table, 
-                self.engine, 
-                if_exists=if_exists_mode, 
-                index=False,
-                method='multi'
-            )
+            # Insert data into tasker data table using COPY
+            self.copy_dataframe(tasker_df, conn, self.tasker_data_table, replace_existing)
             
             logger.info(f"Successfully populated {self.tasker_data_table} with {len(tasker_df)} records")
             return True
@@ -352,52 +549,95 @@ class TaskerAssignmentDBPopulator:
             logger.error(f"Error populating tasker data table: {e}")
             return False
     
-    def run_population(self, csv_path, replace_existing=False):
-        """Main method to run the database population process."""
+    def run_population(self, csv_path, replace_existing=False, drop_indexes=False):
+        """
+        Main method to run the database population process.
+        With drop_indexes, secondary indexes on existing tables are dropped for the load and
+        rebuilt before commit; this locks out readers until commit and rescans the whole table,
+        so it only pays off when appending a large CSV.
+        """
         logger.info("Starting database population process")
         logger.info(f"Using {'test' if self.use_test_tables else 'production'} tables")
         logger.info(f"Tasks table: {self.tasks_table}")
         logger.info(f"Tasker data table: {self.tasker_data_table}")
         logger.info(f"Mode: {'REPLACE existing data' if replace_existing else 'APPEND to existing data'}")
+        logger.info(f"Timestamps: {'UTC (timestamptz)' if self.store_utc_timestamps else 'local time (timezone-naive)'}")
+        
+        # Validate CSV columns from the header row before any parsing or database work
+        csv_columns = self.read_csv_columns(csv_path)
+        if csv_columns is None:
+            return False
+        
+        standardized_columns = [COLUMN_MAPPING.get(col, col) for col in csv_columns]
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in standardized_columns]
+        if missing_columns:
+            logger.error(f"Missing required columns in CSV: {missing_columns}")
+            return False
         
         # Connect to database
         if not self.connect_to_database():
             return False
         
-        # Read CSV file
-        df = self.read_csv_file(csv_path)
-        if df is None:
+        # Open CSV file for chunked reading, reusing the header row read above
+        reader = self.read_csv_file(csv_path, csv_columns=csv_columns)
+        if reader is None:
             return False
         
-        # Convert timezones
-        df = self.convert_timezone(df)
+        self.seen_tasker_ids = set()
+        self.prepared_tables = set()
+        total_rows = 0
         
-        # Validate CSV columns
-        required_columns = [
-            'tasker_id', 'name', 'email', 'phone_number', 'tenure_months', 
-            'lifetime_submitted_invoices_bucket', 'metro_name', 'job_id', 
-            'postal_code', 'latitude', 'longitude', 'country_key', 
-            'latest_schedule_start_at', 'time_zone', 'is_job_bundle', 
-            'is_assigned', 'is_accepted', 'is_scheduled', 'marketplace_key', 
-            'description', 'duration_hours', 'tasker_take_home_pay', 'locale', 'trimmed_address'
-        ]
+        # Replaced tables are created inside the load transaction, which is what COPY FREEZE requires
+        self.copy_freeze = replace_existing
         
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            logger.error(f"Missing required columns in CSV: {missing_columns}")
-            return False
-        
-        # Populate tables
+        # Read, transform and load the CSV one chunk at a time, all in one transaction
+        # so both tables are committed together (closing the connection rolls back on failure)
         try:
-            # Populate tasks table first
-            if not self.populate_tasks_table(df, replace_existing):
-                return False
-            
-            # Populate tasker data table
-            if not self.populate_tasker_data_table(df, replace_existing):
-                return False
+            with self.engine.connect() as conn, reader, closing(self.prefetch_chunks(reader)) as chunks:
+                transaction = conn.begin()
+                
+                # UTC instants can only be appended to an existing timestamptz column
+                if self.store_utc_timestamps and not replace_existing and not self.check_utc_timestamp_column(conn):
+                    return False
+                
+                self.configure_load_session(conn)
+                
+                # Replaced tables are recreated without indexes; existing ones shed theirs only if asked
+                index_defs = []
+                if drop_indexes and not replace_existing:
+                    for table_name in (self.tasks_table, self.tasker_data_table):
+                        index_defs += self.drop_secondary_indexes(conn, table_name)
+                
+                for chunk_number, chunk in enumerate(chunks):
+                    chunk = self.fill_default_values(chunk)
+                    
+                    # Convert timezones
+                    chunk = self.convert_timezone(chunk)
+                    
+                    # Normalize columns shared by both tables once, before splitting them
+                    chunk = self.normalize_locale(chunk)
+                    
+                    # Clean addresses on the chunk so the tasks projection needs no copy
+                    chunk = self.clean_trimmed_address(chunk)
+                    
+                    # Only the first chunk replaces existing data, later chunks append
+                    replace_chunk = replace_existing and chunk_number == 0
+                    
+                    # Populate tasks table first
+                    if not self.populate_tasks_table(chunk, conn, replace_chunk):
+                        return False
+                    
+                    # Populate tasker data table
+                    if not self.populate_tasker_data_table(chunk, conn, replace_chunk):
+                        return False
+                    
+                    total_rows += len(chunk)
+                    logger.info(f"Processed chunk {chunk_number + 1} ({total_rows} rows so far)")
+                
+                self.recreate_indexes(conn, index_defs)
+                transaction.commit()
             
-            logger.info("Database population completed successfully")
+            logger.info(f"Database population completed successfully ({total_rows} rows)")
             return True
         except Exception as e:
             logger.error(f"Error during table population: {e}")
@@ -410,20 +650,27 @@ def main():
     parser.add_argument('--test', action='store_true', help='Use test tables instead of production tables')
     parser.add_argument('--replace', action='store_true', help='Replace existing data instead of appending')
     parser.add_argument('--env-file', help='Path to .env file (default: .env)')
+    parser.add_argument('--drop-indexes', action='store_true', help='Drop secondary indexes during an append and rebuild them afterwards (for large loads)')
+    parser.add_argument('--utc-timestamps', action='store_true', help='Store latest_schedule_start_at as UTC timestamptz instead of converting to local time')
     
     args = parser.parse_args()
     
-    # Load environment variables from specified file
-    if args.env_file:
-        load_dotenv(args.env_file)
-    else:
-        load_dotenv()
+    # Load database config from the specified .env file (or the default one)
+    config = get_db_config(args.env_file)
     
     # Create populator instance
-    populator = TaskerAssignmentDBPopulator(use_test_tables=args.test)
+    populator = TaskerAssignmentDBPopulator(
+        use_test_tables=args.test,
+        store_utc_timestamps=args.utc_timestamps,
+        config=config
+    )
     
     # Run population
-    success = populator.run_population(args.csv_path, replace_existing=args.replace)
+    success = populator.run_population(
+        args.csv_path,
+        replace_existing=args.replace,
+        drop_indexes=args.drop_indexes
+    )
     
     if success:
         print("✅ Database population completed successfully!")